@@ -37,9 +37,30 @@ class FitMaskToImage:
             },
             "optional": {
                 "latent": ("LATENT",),  # Optional latent for inpainting
+                "build_preview": (
+                    "BOOLEAN",
+                    {"default": True}
+                ),  # Disable to skip RGBA preview work when the output is unused
+                "preview_dtype": (
+                    ["fp32", "uint8"],
+                    {"default": "fp32"}
+                ),  # uint8 shrinks the preview 4x but breaks IMAGE consumers
+                "emit_info": (
+                    "BOOLEAN",
+                    {"default": False}
+                ),  # Enable to build the info string output
             }
         }
 
+    # Channel-name -> index lookup for _image_to_mask, built once at class
+    # definition instead of per call
+    _CHANNEL_INDEX = {
+        "red": 0,
+        "green": 1,
+        "blue": 2,
+        "alpha": 3,
+    }
+
     RETURN_TYPES = ("MASK", "IMAGE", "STRING", "LATENT")
     RETURN_NAMES = ("fixed_mask", "preview_image", "info", "masked_latent")
     FUNCTION = "fix_mask_dimensions"
@@ -51,7 +72,10 @@ class FitMaskToImage:
         image: torch.Tensor,
         mask: torch.Tensor,
         missing_mask: str = "pass_through",
-        latent: Optional[Dict[str, Any]] = None
+        latent: Optional[Dict[str, Any]] = None,
+        build_preview: bool = True,
+        preview_dtype: str = "fp32",
+        emit_info: bool = False
     ) -> Tuple[torch.Tensor, torch.Tensor, str, Optional[Dict[str, Any]]]:
         """
         Main processing function that replicates the 10-node workflow.
@@ -61,6 +85,12 @@ class FitMaskToImage:
             mask: Mask to fix [B, H, W] or [B, H, W, 1]
             missing_mask: How to handle empty masks ("all_visible", "all_hidden", "pass_through", "error")
             latent: Optional latent dict with "samples" key
+            build_preview: When False, skip building the RGBA preview and
+                return a 1x1 placeholder instead
+            preview_dtype: "fp32" (default) keeps the preview a standard
+                ComfyUI IMAGE; "uint8" quantizes it for display-only use
+            emit_info: When True, build the info string; otherwise the info
+                output is an empty string
 
         Returns:
             fixed_mask: Final mask from alpha channel [B, H, W]
@@ -69,8 +99,10 @@ class FitMaskToImage:
             masked_latent: Latent with mask applied (or None)
         """
 
-        # Step 1: Extract dimensions from source image (ImpactImageInfo equivalent)
-        target_height, target_width = self._extract_dimensions(image)
+        # Step 1: Validate the image once and unpack its shape into plain
+        # ints (ImpactImageInfo equivalent); the ints are threaded through
+        # the helpers so nothing re-reads image.shape downstream.
+        batch, target_height, target_width, channels = self._extract_dimensions(image)
 
         # Check if mask is empty and handle according to missing_mask parameter
         # "pass_through" skips this check entirely (original behavior)
@@ -84,64 +116,231 @@ class FitMaskToImage:
                 mode=missing_mask,
                 height=target_height,
                 width=target_width,
-                batch_size=image.shape[0]
+                batch_size=batch
             )
 
-        original_height, original_width = self._get_mask_dimensions(mask)
+        # Move the mask to the image's device up front (common when the
+        # mask came from a CPU preview node) so the transfer happens once,
+        # explicitly, instead of implicitly inside the first kernel that
+        # touches the mask
+        if mask.device != image.device:
+            mask = mask.to(image.device)
 
-        # Step 2: Convert mask to image format (MaskToImage equivalent)
-        mask_as_image = self._mask_to_image(mask)
+        # Normalize mask layout to [B, 1, H, W] once (views only, no
+        # copies); every downstream consumer sees this single fixed layout
+        mask = self._to_bchw(mask)
 
-        # Step 3: Scale mask-image to match source dimensions (ImageScale equivalent)
-        scaled_mask_image = self._scale_image(
-            mask_as_image,
-            target_width,
-            target_height,
-            method="nearest-exact"
-        )
+        original_height, original_width = mask.shape[2], mask.shape[3]
 
-        # Step 4: Convert scaled image to mask using red channel (ImageToMask with red)
-        intermediate_mask = self._image_to_mask(scaled_mask_image, channel="red")
+        # Ensure values in [0, 1] range exactly once, up front; the scaled
+        # outputs inherit the range (nearest-exact never interpolates), so
+        # nothing downstream re-clamps
+        mask = torch.clamp(mask, 0.0, 1.0)
 
-        # Step 5: Merge original RGB + scaled mask as alpha (MergeImageChannels)
-        preview_image = self._merge_channels(image, intermediate_mask)
+        # Steps 2-6: Scale the mask and assemble the RGBA preview. The
+        # tensor-only core runs through torch.compile when available so the
+        # interpolate and preview fill fuse into as few kernels as possible.
+        fixed_mask, preview_image = self._run_core(
+            image, mask, batch, target_height, target_width,
+            channels, build_preview
+        )
 
-        # Step 6: Extract alpha channel as final mask (ImageToMask with alpha)
-        fixed_mask = self._image_to_mask(preview_image, channel="alpha")
+        # Optional display-only quantization. uint8 carries the preview at
+        # a quarter of fp32's memory, but it violates ComfyUI's IMAGE
+        # contract (float in [0, 1]) for downstream consumers, so it stays
+        # strictly opt-in. Rounding (not truncation) keeps 0.999 at 255.
+        if preview_dtype == "uint8" and preview_image.dtype == torch.float32:
+            preview_image = (
+                (preview_image * 255.0).round_().clamp_(0.0, 255.0).to(torch.uint8)
+            )
 
-        # Step 7: Apply mask to latent if provided (SetLatentNoiseMask equivalent)
+        # Step 7: Apply mask to latent if provided (SetLatentNoiseMask
+        # equivalent). The noise mask is resized straight from the original
+        # mask to latent resolution; routing it through fixed_mask first
+        # would just add a redundant full-resolution resize before the
+        # downscale to 1/8.
         masked_latent = None
         if latent is not None:
-            masked_latent = self._apply_mask_to_latent(latent, fixed_mask)
-
-        # Generate info string
-        info = self._generate_info(
-            original_width, original_height,
-            target_width, target_height,
-            has_latent=latent is not None
-        )
+            masked_latent = self._apply_mask_to_latent(latent, mask)
+
+        # Generate info string only when asked for; workflows that leave the
+        # output unwired skip the formatting. The output is always a real
+        # str so downstream consumers can use it verbatim.
+        info = ""
+        if emit_info:
+            info = self._generate_info(
+                original_width, original_height,
+                target_width, target_height,
+                has_latent=latent is not None
+            )
 
         return (fixed_mask, preview_image, info, masked_latent)
 
-    def _extract_dimensions(self, image: torch.Tensor) -> Tuple[int, int]:
-        """Extract height and width from image tensor (ImpactImageInfo equivalent)."""
+    def _core(
+        self,
+        image: torch.Tensor,
+        mask: torch.Tensor,
+        batch: int,
+        target_height: int,
+        target_width: int,
+        channels: int,
+        build_preview: bool
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Tensor-only core: scale the mask and build the RGBA preview.
+
+        Kept free of Python-side validation, empty-mask handling, and dict
+        work so torch.compile can trace it cleanly. Expects mask already
+        normalized to [B, 1, H, W] and clamped to [0, 1], with the image
+        shape pre-unpacked into ints by the caller.
+        """
+        original_height, original_width = mask.shape[2], mask.shape[3]
+
+        if (original_height, original_width) == (target_height, target_width):
+            # Fast path: dimensions already match (common when a pipeline
+            # re-runs with matched inputs), so the mask passes through
+            # untouched.
+            fixed_mask = mask.squeeze(1)
+        else:
+            # Steps 2-4: Scale mask to match source dimensions. The original
+            # workflow's MaskToImage -> ImageScale -> ImageToMask(red) chain
+            # collapses into a single interpolate on the mask itself, avoiding
+            # two intermediate image tensors. nearest-exact preserves the input
+            # range, so no re-clamping is needed afterwards. The scaled mask
+            # already is the final mask; it is mathematically identical to
+            # preview_image[..., 3] below.
+            fixed_mask = self._nearest_scale_bchw(
+                mask, target_height, target_width
+            ).squeeze(1)
+
+        # Steps 5-6: Merge original RGB + fitted mask as alpha
+        # (MergeImageChannels). This output only feeds the preview, so skip
+        # the allocation entirely when the caller does not want it.
+        if build_preview:
+            preview_image = self._merge_channels(
+                image, fixed_mask, batch, target_height, target_width, channels
+            )
+        else:
+            preview_image = torch.zeros(
+                (1, 1, 1, 4), dtype=image.dtype, device=image.device
+            )
+
+        return fixed_mask, preview_image
+
+    def _run_core(
+        self,
+        image: torch.Tensor,
+        mask: torch.Tensor,
+        batch: int,
+        target_height: int,
+        target_width: int,
+        channels: int,
+        build_preview: bool
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Run _core through torch.compile when available, eager otherwise.
+
+        Compilation is attempted once, lazily, on first use; dynamic=True
+        avoids a recompile for every new mask/image resolution. Any failure
+        (pre-2.0 torch, unsupported backend, runtime trace error) falls back
+        to the eager core permanently.
+        """
+        core = getattr(self, "_compiled_core", None)
+        if core is None and not getattr(self, "_compile_disabled", False):
+            if hasattr(torch, "compile"):
+                try:
+                    core = torch.compile(self._core, dynamic=True)
+                    self._compiled_core = core
+                except Exception:
+                    self._compile_disabled = True
+            else:
+                self._compile_disabled = True
+
+        if core is None:
+            return self._core(
+                image, mask, batch, target_height, target_width,
+                channels, build_preview
+            )
+
+        try:
+            return core(
+                image, mask, batch, target_height, target_width,
+                channels, build_preview
+            )
+        except Exception:
+            # Compiled variant failed at runtime; disable it and go eager
+            self._compiled_core = None
+            self._compile_disabled = True
+            return self._core(
+                image, mask, batch, target_height, target_width,
+                channels, build_preview
+            )
+
+    def _extract_dimensions(self, image: torch.Tensor) -> Tuple[int, int, int, int]:
+        """
+        Validate the image tensor and unpack its shape into plain ints
+        (ImpactImageInfo equivalent). Done exactly once per call; downstream
+        helpers receive the ints rather than re-reading image.shape.
+        """
         if len(image.shape) != 4:
             raise ValueError(f"Expected 4D image tensor [B,H,W,C], got shape {image.shape}")
 
         batch, height, width, channels = image.shape
-        return height, width
+        return batch, height, width, channels
 
-    def _get_mask_dimensions(self, mask: torch.Tensor) -> Tuple[int, int]:
-        """Get current mask dimensions."""
-        if len(mask.shape) == 4:
-            # [B, H, W, 1]
-            return mask.shape[1], mask.shape[2]
-        elif len(mask.shape) == 3:
-            # [B, H, W]
-            return mask.shape[1], mask.shape[2]
-        elif len(mask.shape) == 2:
-            # [H, W]
-            return mask.shape[0], mask.shape[1]
+    def _nearest_scale_bchw(
+        self,
+        tensor: torch.Tensor,
+        target_height: int,
+        target_width: int
+    ) -> torch.Tensor:
+        """
+        Nearest-exact resize of a [B, C, H, W] tensor.
+
+        Integer upscales (the common 2x/4x/8x cases in diffusion workflows)
+        take a pure index-lookup path via repeat_interleave instead of
+        interpolate's general fractional-coordinate kernel; the result is
+        identical since nearest-exact maps output pixel i to i // scale for
+        integer ratios. Everything else falls back to F.interpolate.
+        """
+        current_height, current_width = tensor.shape[2], tensor.shape[3]
+
+        if (
+            target_height % current_height == 0
+            and target_width % current_width == 0
+        ):
+            scale_y = target_height // current_height
+            scale_x = target_width // current_width
+            if scale_y == 1 and scale_x == 1:
+                return tensor
+            return tensor.repeat_interleave(scale_y, dim=-2).repeat_interleave(scale_x, dim=-1)
+
+        return F.interpolate(
+            tensor,
+            size=(target_height, target_width),
+            mode="nearest-exact"
+        )
+
+    def _to_bchw(self, mask: torch.Tensor) -> torch.Tensor:
+        """
+        Normalize mask layout to [B, 1, H, W] using views only (no copies).
+
+        Accepts [H, W], [B, H, W], or [B, H, W, 1] tensors. Interpolate,
+        latent scaling, and the preview fill all consume this one fixed
+        layout, so shape dispatch happens exactly once per call.
+        """
+        if mask.ndim == 2:
+            # [H, W] -> [1, 1, H, W]
+            return mask[None, None]
+        elif mask.ndim == 3:
+            # [B, H, W] -> [B, 1, H, W]
+            return mask[:, None]
+        elif mask.ndim == 4:
+            # [B, H, W, 1] -> [B, 1, H, W]; other 4D masks are taken to be
+            # [B, C, H, W] already and pass through untouched
+            if mask.shape[-1] == 1:
+                return mask.permute(0, 3, 1, 2)
+            return mask
         else:
             raise ValueError(f"Unexpected mask shape: {mask.shape}")
 
@@ -172,17 +371,19 @@ class FitMaskToImage:
         self,
         image: torch.Tensor,
         target_width: int,
-        target_height: int,
-        method: str = "nearest-exact"
+        target_height: int
     ) -> torch.Tensor:
         """
         Scale image to target dimensions (ImageScale equivalent).
 
+        Always uses nearest-exact: it is the only mode this node needs, and
+        hard-coding it keeps the call trivially inlineable under
+        torch.compile (no dead align_corners branch to trace around).
+
         Args:
             image: [B, H, W, C]
             target_width: Target width
             target_height: Target height
-            method: Interpolation method
         """
         batch, current_height, current_width, channels = image.shape
 
@@ -190,16 +391,17 @@ class FitMaskToImage:
         if current_height == target_height and current_width == target_width:
             return image
 
-        # PyTorch interpolate expects [B, C, H, W]
-        image = image.permute(0, 3, 1, 2)
+        # PyTorch interpolate expects [B, C, H, W]. Keeping the data in
+        # channels-last memory format means the permute stays a view (the
+        # HWC source already has that layout) and interpolate dispatches
+        # its dedicated channels-last kernel, which is notably faster than
+        # the contiguous path for small channel counts.
+        image = image.permute(0, 3, 1, 2).contiguous(
+            memory_format=torch.channels_last
+        )
 
         # Scale
-        scaled = F.interpolate(
-            image,
-            size=(target_height, target_width),
-            mode="nearest-exact" if method == "nearest-exact" else method,
-            align_corners=None if method == "nearest-exact" else False
-        )
+        scaled = self._nearest_scale_bchw(image, target_height, target_width)
 
         # Convert back to [B, H, W, C]
         scaled = scaled.permute(0, 2, 3, 1)
@@ -214,17 +416,12 @@ class FitMaskToImage:
             image: [B, H, W, C]
             channel: "red", "green", "blue", or "alpha"
         """
-        channel_map = {
-            "red": 0,
-            "green": 1,
-            "blue": 2,
-            "alpha": 3
-        }
-
-        if channel not in channel_map:
-            raise ValueError(f"Invalid channel: {channel}. Must be one of {list(channel_map.keys())}")
+        if channel not in self._CHANNEL_INDEX:
+            raise ValueError(
+                f"Invalid channel: {channel}. Must be one of {list(self._CHANNEL_INDEX.keys())}"
+            )
 
-        channel_idx = channel_map[channel]
+        channel_idx = self._CHANNEL_INDEX[channel]
 
         # Handle grayscale images (only 1 channel)
         if image.shape[3] == 1:
@@ -239,36 +436,42 @@ class FitMaskToImage:
 
         return mask
 
-    def _merge_channels(self, image: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+    def _merge_channels(
+        self,
+        image: torch.Tensor,
+        mask: torch.Tensor,
+        batch: int,
+        height: int,
+        width: int,
+        channels: int
+    ) -> torch.Tensor:
         """
         Merge RGB from image with mask as alpha channel (MergeImageChannels equivalent).
 
         Args:
             image: Source RGB image [B, H, W, C]
             mask: Mask to use as alpha [B, H, W]
+            batch/height/width/channels: image.shape, pre-unpacked by the caller
 
         Returns:
             RGBA image [B, H, W, 4]
         """
-        batch, height, width, channels = image.shape
-
         # Ensure mask matches image dimensions
         if mask.shape[1:] != (height, width):
             raise ValueError(f"Mask dimensions {mask.shape[1:]} don't match image {(height, width)}")
 
-        # Expand mask to [B, H, W, 1]
-        mask_expanded = mask.unsqueeze(-1)
-
-        if channels == 3:
-            # RGB image - add alpha channel
-            rgba = torch.cat([image, mask_expanded], dim=-1)
-        elif channels == 4:
-            # Already RGBA - replace alpha with mask
-            rgba = torch.cat([image[:, :, :, :3], mask_expanded], dim=-1)
+        # Fill a single pre-allocated RGBA buffer with two slice copies
+        # instead of torch.cat: the copies dispatch as plain memcpys and
+        # the mask drops straight into the alpha plane with no unsqueeze.
+        rgba = torch.empty(
+            (batch, height, width, 4), dtype=image.dtype, device=image.device
+        )
+        if channels >= 3:
+            rgba[..., :3].copy_(image[..., :3])
         else:
-            # Grayscale or other format - replicate to RGB and add alpha
-            rgb = image.repeat(1, 1, 1, 3)[:, :, :, :3]  # Ensure exactly 3 channels
-            rgba = torch.cat([rgb, mask_expanded], dim=-1)
+            # Grayscale or other format - broadcast first channel to RGB
+            rgba[..., :3].copy_(image[..., :1])
+        rgba[..., 3].copy_(mask)
 
         return rgba
 
@@ -282,7 +485,7 @@ class FitMaskToImage:
 
         Args:
             latent: Dict with "samples" key [B, C, H_latent, W_latent]
-            mask: Mask to apply [B, H, W]
+            mask: Mask to apply [B, 1, H, W]
 
         Returns:
             New latent dict with "noise_mask" added
@@ -299,11 +502,8 @@ class FitMaskToImage:
         # Scale mask to latent dimensions
         mask_for_latent = self._scale_mask_for_latent(mask, latent_height, latent_width)
 
-        # Create new latent dict with mask applied
-        masked_latent = latent.copy()
-        masked_latent["noise_mask"] = mask_for_latent
-
-        return masked_latent
+        # Build the result dict in one pass; the input latent stays untouched
+        return {**latent, "noise_mask": mask_for_latent}
 
     def _scale_mask_for_latent(
         self,
@@ -311,25 +511,8 @@ class FitMaskToImage:
         target_height: int,
         target_width: int
     ) -> torch.Tensor:
-        """Scale mask to latent dimensions."""
-        current_height, current_width = mask.shape[1], mask.shape[2]
-
-        if current_height == target_height and current_width == target_width:
-            return mask
-
-        # PyTorch interpolate expects [B, C, H, W]
-        mask_4d = mask.unsqueeze(1)  # Add channel dimension
-
-        scaled = F.interpolate(
-            mask_4d,
-            size=(target_height, target_width),
-            mode="nearest-exact"
-        )
-
-        # Remove channel dimension
-        scaled = scaled.squeeze(1)
-
-        return scaled
+        """Scale a [B, 1, H, W] mask to latent dimensions, returning [B, H, W]."""
+        return self._nearest_scale_bchw(mask, target_height, target_width).squeeze(1)
 
     def _generate_info(
         self,